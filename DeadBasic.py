@@ -2,17 +2,34 @@
 # DeadBasic.BA
 # v0.4.5: Added try catch blocks
 
-import sys, shlex, pathlib
+import sys, re, pathlib
+import collections
+import functools
 import getpass
 import math
+import operator
 import traceback
 
 VERSION = "0.4.5"
 
+def _print(value):
+    """print(value) as a single write of the text and its newline."""
+    # sys.stdout looked up per call so redirecting it still works
+    sys.stdout.write(f"{value}\n")
+
 # ---------- Error types ----------
 class DeadBasicError(Exception):
-    """Base interpreter error."""
-    pass
+    """
+    Base interpreter error. Raised with DeadBasic._fmt's (file, line_no,
+    msg); the "[file:line N] msg" text is only built when str()'d, so
+    errors swallowed by a TRY body never pay for it.
+    """
+    def __init__(self, where):
+        super().__init__(where)
+        self.file, self.line_no, self.msg = where
+
+    def __str__(self):
+        return f"[{self.file}:line {self.line_no}] {self.msg}"
 
 class SyntaxDeadBasicError(DeadBasicError):
     """Syntax error (e.g., missing indent, bad keywords)."""
@@ -22,37 +39,225 @@ class RuntimeDeadBasicError(DeadBasicError):
     """Runtime error (e.g., type mismatch, unknown var)."""
     pass
 
+# ---------- Line kinds (assigned once per line by _lex_line) ----------
+K_BLANK    = 0   # empty line or comment (dropped from loaded programs)
+K_ERROR    = 1   # tokenizing failed; args holds the parse error message
+K_IF       = 2
+K_ELSE     = 3
+K_ENDIF    = 4
+K_WHILE    = 5
+K_ENDWHILE = 6
+K_TRY      = 7
+K_CATCH    = 8
+K_ENDTRY   = 9
+# Statement kinds: everything from K_DECL up
+K_DECL     = 10
+K_UNKNOWN  = 11  # not a known command when lexed; looked up again if run
+K_ADD      = 12  # two-operand arithmetic whose arity was checked when
+K_SUBT     = 13  # lexed: runs as _cmd_table[kind](arg0, arg1, line_no)
+K_DIV      = 14
+K_TIMES    = 15
+K_CMD      = 16  # K_CMD + i is the i-th entry of DeadBasic.commands
+
+# One lexed line, from DeadBasic._lex_line. `call` is the bound command of
+# a statement line, filled in by _load_program (None otherwise).
+_Line = collections.namedtuple(
+    "_Line", "indent head head_l args kind arg0 arg1 call")
+
+_BINARY_KINDS = {"add": K_ADD, "subt": K_SUBT, "div": K_DIV, "times": K_TIMES}
+
+_KEYWORD_KINDS = {
+    "if": K_IF, "else": K_ELSE, "endif": K_ENDIF,
+    "while": K_WHILE, "endwhile": K_ENDWHILE,
+    "try": K_TRY, "catch": K_CATCH, "endtry": K_ENDTRY,
+}
+_BLOCK_KEYWORDS = frozenset(_KEYWORD_KINDS)
+_LOOP_KEYWORDS = frozenset({"while", "endwhile"})
+_SKIP_PREFIXES = ("#", "``")   # comment markers
+
+_MISSING = object()   # dict.get default for "no such variable"
+
+# Bits of DeadBasic._ctx_flags, one per open flow-control context
+_CTX_IF    = 1
+_CTX_WHILE = 2
+_CTX_TRY   = 4
+
+# Lexical owner of an indented line, from _load_program. Only picks the
+# body handler: each one checks _ctx_flags and falls back to the generic
+# path, since openfile or an unclosed IF can change the owner at runtime.
+BK_NONE  = 0   # no single owner; decided from _ctx_flags
+BK_IF    = 1
+BK_WHILE = 2
+BK_TRY   = 3   # try section
+BK_CATCH = 4   # catch section
+
+# ---------- Condition operators ----------
+_EQUALITY_OPS = {"=": operator.eq, "!=": operator.ne}   # compare raw values
+_ORDER_OPS = {"<": operator.lt, ">": operator.gt,       # compare as numbers
+              "<=": operator.le, ">=": operator.ge}
+
+# ---------- Tokenizer ----------
+_WS_RUN = re.compile(r"[ \t\r\n]*").match
+_PLAIN_RUN = re.compile(r"[^ \t\r\n'\"\\]+").match
+_DQUOTE_RUN = re.compile(r'[^"\\]*').match
+_WORDS = re.compile(r"[^ \t\r\n]+").findall   # not str.split: shlex only splits on these
+
+def _tokenize(s):
+    """
+    Split a line the way shlex.split(s, posix=True) does: whitespace
+    separates tokens, '...' and "..." group text (the quotes are dropped)
+    and a backslash escapes the next character (inside double quotes only
+    before " or \\). Raises ValueError with shlex's messages on an
+    unclosed quote or a trailing backslash.
+    """
+    if "'" not in s and '"' not in s and "\\" not in s:
+        return _WORDS(s)   # common case: nothing to unquote
+    tokens = []
+    n = len(s)
+    i = _WS_RUN(s, 0).end()
+    while i < n:
+        parts = []
+        while i < n:
+            c = s[i]
+            if c in " \t\r\n":
+                break
+            if c == "'":
+                j = s.find("'", i + 1)
+                if j < 0:
+                    raise ValueError("No closing quotation")
+                parts.append(s[i + 1:j])
+                i = j + 1
+            elif c == '"':
+                i += 1
+                while True:
+                    j = _DQUOTE_RUN(s, i).end()
+                    parts.append(s[i:j])
+                    if j >= n:
+                        raise ValueError("No closing quotation")
+                    if s[j] == '"':
+                        i = j + 1
+                        break
+                    # backslash inside double quotes
+                    if j + 1 >= n:
+                        raise ValueError("No escaped character")
+                    nxt = s[j + 1]
+                    parts.append(nxt if nxt in '"\\' else "\\" + nxt)
+                    i = j + 2
+            elif c == "\\":
+                if i + 1 >= n:
+                    raise ValueError("No escaped character")
+                parts.append(s[i + 1])
+                i += 2
+            else:
+                j = _PLAIN_RUN(s, i).end()
+                parts.append(s[i:j])
+                i = j
+        tokens.append("".join(parts))
+        i = _WS_RUN(s, i).end()
+    return tokens
+
+
+# ---------- Constant pool ----------
+def _literal(token):
+    """Value of a token that is not a variable name."""
+    # int()/float() can only succeed after a digit, sign, dot or
+    # whitespace, so bare words skip the try/except entirely.
+    c = token[:1]
+    if c and (c.isdigit() or c in "+-." or c.isspace()):
+        try:
+            if "." in token:
+                return float(token)
+            return int(token)
+        except ValueError:
+            pass
+    if len(token) >= 2 and token[0] == token[-1] and token[0] in "\"'":
+        return token[1:-1]
+    return token
+
+
+class _ConstPool(dict):
+    """token -> literal value, parsed the first time a token is looked up."""
+    __slots__ = ()
+
+    def __missing__(self, token):
+        value = self[token] = _literal(token)
+        return value
+
 
 class DeadBasic:
+    # Fixed attribute set: slot reads are cheaper than __dict__ lookups on
+    # the per-line paths. Add new attributes here as well.
+    __slots__ = (
+        "var_values", "var_types", "commands", "type_keywords",
+        "if_cond_true", "if_in_else", "while_start_pc", "while_cond_fn",
+        "try_ctx", "_ctx_flags", "current_file",
+        "_cmd_kinds", "_cmd_table", "_dispatch", "_body_dispatch",
+        "_consts", "_jump_table", "_conds", "_file_cache",
+    )
+
     def __init__(self):
-        # Vars: name -> {"type": "int|long|double|str", "value": pyvalue}
-        self.vars = {}
+        # Vars, as parallel dicts: name -> pyvalue, name -> "int|long|double|str"
+        self.var_values = {}
+        self.var_types = {}
 
         # Commands
         self.commands = {
-            "printtext".lower(): self.cmd_printtext,
-            "showvars".lower():  self.cmd_showvars,
-            "openfile".lower():  self.cmd_openfile,
-            "add".lower():       self.cmd_add,
-            "help".lower():      self.help,
-            "subt".lower():      self.cmd_subt,
-            "div".lower() :      self.cmd_div,
-            "times".lower():     self.cmd_multiply,
-            "sqrt".lower():      self.cmd_squareroot,
-            "input".lower():     self.cmd_input,
+            "printtext": self.cmd_printtext,
+            "showvars":  self.cmd_showvars,
+            "openfile":  self.cmd_openfile,
+            "add":       self.cmd_add,
+            "help":      self.help,
+            "subt":      self.cmd_subt,
+            "div":       self.cmd_div,
+            "times":     self.cmd_multiply,
+            "sqrt":      self.cmd_squareroot,
+            "input":     self.cmd_input,
         }
 
         # Declarations
-        self.type_keywords = {"int", "long", "double", "str"}
+        self.type_keywords = frozenset({"int", "long", "double", "str"})
 
         # Flow-control contexts (no nesting by design)
-        self.if_ctx = None             # {"cond_true": bool, "in_else": bool}
-        self.while_ctx = None          # {"start_pc": int, "cond_tokens": list[str]}
-        self.try_ctx = None            # {"has_error": bool, "in_catch": bool, "err_name": str|None, "err_msg": str|None}
+        self.if_cond_true = False      # open IF (see _ctx_flags): condition result
+        self.if_in_else = False        #   and whether 'else' was seen
+        self.while_start_pc = 0        # open WHILE: header pc
+        self.while_cond_fn = None      #   and its compiled condition
+        self.try_ctx = None            # {"has_error": bool, "in_catch": bool, "err_name": str|None, "err_msg": str|DeadBasicError|None}
+        self._ctx_flags = 0            # bitmask of the open contexts (_CTX_*)
 
         # For better error messages
         self.current_file = "<repl>"
 
+        # Per-command line kinds; _cmd_table[kind] is the command to call
+        self._cmd_kinds = {name: K_CMD + i for i, name in enumerate(self.commands)}
+        cmd_table = [None] * (K_CMD + len(self.commands))
+        cmd_table[K_ADD] = self._add
+        cmd_table[K_SUBT] = self._subt
+        cmd_table[K_DIV] = self._div
+        cmd_table[K_TIMES] = self._multiply
+        cmd_table[K_CMD:] = self.commands.values()
+        self._cmd_table = tuple(cmd_table)
+
+        # run_file: handler per line kind, per owner for indented
+        # statements, and the current file's jump table
+        self._dispatch = [self._h_top_statement] * len(self._cmd_table)
+        self._dispatch[K_IF] = self._h_if
+        self._dispatch[K_ELSE] = self._h_else
+        self._dispatch[K_ENDIF] = self._h_endif
+        self._dispatch[K_WHILE] = self._h_while
+        self._dispatch[K_ENDWHILE] = self._h_endwhile
+        self._dispatch[K_TRY] = self._h_try
+        self._dispatch[K_CATCH] = self._h_catch
+        self._dispatch[K_ENDTRY] = self._h_endtry
+        self._dispatch[K_ERROR] = self._h_error
+        self._body_dispatch = (self._h_body_statement, self._h_if_body,
+                               self._h_while_body, self._h_try_body,
+                               self._h_catch_body)
+        self._consts = _ConstPool()    # literal values of operand tokens
+        self._jump_table = []
+        self._conds = []               # compiled if/while condition per pc, or None
+        self._file_cache = {}          # resolved path -> ((mtime_ns, size),) + _load_program's result
+
     # ---------- Help Command --------
     @staticmethod
     def help():
@@ -65,44 +270,51 @@ class DeadBasic:
     # ---------- helpers ----------
     def _resolve(self, token, line_no):
         """Resolve token to a Python value (maybe str, int, float)."""
-        if token in self.vars:
-            return self.vars[token]["value"]
-        try:
-            if "." in token:
-                return float(token)
-            return int(token)
-        except ValueError:
-            pass
-        if len(token) >= 2 and token[0] == token[-1] and token[0] in "\"'":
-            return token[1:-1]
-        return token
+        v = self.var_values.get(token, _MISSING)
+        if v is not _MISSING:
+            return v
+        return self._consts[token]
 
     def _to_number(self, value, line_no, label="value"):
-        if isinstance(value, (int, float)):
+        t = type(value)
+        if t is int or t is float:
             return float(value)
-        if isinstance(value, str):
+        if t is str:
             try:
                 if "." in value:
                     return float(value)
                 return float(int(value))
             except ValueError:
                 pass
-        sys.stderr.write("\033[91m")
-        traceback.print_exc()
-        sys.stderr.write("\033[0m")
         raise RuntimeDeadBasicError(self._fmt(line_no,f"{label} is not numeric"))
 
+    def _num_args(self, a_tok, b_tok, line_no):
+        """Both operands of a two-number command; ints stay ints, the rest become floats."""
+        vals = self.var_values
+        consts = self._consts
+        to_num = self._to_number
+        a = vals.get(a_tok, _MISSING)
+        if a is _MISSING:
+            a = consts[a_tok]
+        if type(a) is not int and type(a) is not float:
+            a = to_num(a, line_no, "first argument")
+        b = vals.get(b_tok, _MISSING)
+        if b is _MISSING:
+            b = consts[b_tok]
+        if type(b) is not int and type(b) is not float:
+            b = to_num(b, line_no, "second argument")
+        return a, b
+
     def _truthy(self, value):
-        if value is None:
-            return False
-        if isinstance(value, (int, float)):
-            return value != 0
-        if isinstance(value, str):
+        t = type(value)
+        if t is str:
             return value != ""
-        return True
+        if t is int or t is float:
+            return value != 0
+        return value is not None
 
     def _fmt(self, line_no, msg):
-        return f"[{self.current_file}:line {line_no}] {msg}"
+        return (self.current_file, line_no, msg)
 
     def _detect_indent(self, line: str):
         """
@@ -110,57 +322,118 @@ class DeadBasic:
         as a single indent level. No nested blocks in this language,
         so we collapse all leading whitespace to indent=1.
         """
-        i = 0
-        while i < len(line) and line[i].isspace() and line[i] not in "\r\n":
-            i += 1
-        if i == 0:
+        content = line.lstrip()
+        if len(content) == len(line):
             return 0, line
-        return 1, line[i:]
+        # lstrip() also eats CR/LF, which never count as indentation
+        prefix = line[:len(line) - len(content)]
+        if "\r" in prefix or "\n" in prefix:
+            i = min(j for j in (prefix.find("\r"), prefix.find("\n")) if j >= 0)
+            if i == 0:
+                return 0, line
+            return 1, line[i:]
+        return 1, content
+
+    def _lex_line(self, line):
+        """
+        Lex one physical line into a _Line, with args frozen into a tuple
+        and its first two entries pre-bound as arg0/arg1 (None if
+        missing). Done once per line so loops never re-tokenize,
+        re-lowercase or re-classify their bodies.
+        """
+        indent, content = self._detect_indent(line)
+        raw = content.strip()
+        if not raw or raw.startswith(_SKIP_PREFIXES):
+            return _Line(indent, None, None, (), K_BLANK, None, None, None)
+        try:
+            tokens = _tokenize(raw)
+        except ValueError as e:
+            return _Line(indent, None, None, (str(e),), K_ERROR, None, None, None)
+        # Interned so command/var dict lookups hit on identity
+        tokens = [sys.intern(t) for t in tokens]
+        head = tokens[0]
+        head_l = sys.intern(head.lower())
+        kind = _KEYWORD_KINDS.get(head_l)
+        if kind is None:
+            if head_l in self.type_keywords:
+                kind = K_DECL
+            elif head_l in _BINARY_KINDS and len(tokens) == 3:
+                # arity known good; a wrong count keeps the plain command
+                # kind so the usual error is raised if the line runs
+                kind = _BINARY_KINDS[head_l]
+            else:
+                kind = self._cmd_kinds.get(head_l, K_UNKNOWN)
+        args = tuple(tokens[1:])
+        return _Line(indent, head, head_l, args, kind,
+                     args[0] if args else None, args[1] if len(args) > 1 else None,
+                     None)
 
     # ---------- condition evaluation (shared by IF/WHILE) ----------
     def _eval_condition_tokens(self, tokens, line_no):
+        return self._compile_condition(tokens, line_no)(line_no)
+
+    def _compile_condition(self, tokens, line_no):
+        """
+        Turn condition tokens into a callable(line_no) returning the result.
+        Shape errors are raised here; value errors when the callable runs,
+        against the line it is called for (endwhile re-checks the header's
+        condition and reports its own line).
+        """
         if not tokens:
             raise SyntaxDeadBasicError(self._fmt(line_no, "condition required"))
         if tokens[0].lower() == "not":
             if len(tokens) != 2:
                 raise SyntaxDeadBasicError(self._fmt(line_no, "'not' expects exactly one value"))
-            val = self._resolve(tokens[1], line_no)
-            return not self._truthy(val)
+            get = self._compile_operand(tokens[1])
+            truthy = self._truthy
+            return lambda ln: not truthy(get(ln))
 
         if len(tokens) != 3:
             raise SyntaxDeadBasicError(self._fmt(line_no,
                 "condition must be: <lhs> <op> <rhs> or 'not <value>'"))
 
         lhs_tok, op, rhs_tok = tokens
-        lhs_val = self._resolve(lhs_tok, line_no)
-        rhs_val = self._resolve(rhs_tok, line_no)
-
-        if op == "=":
-            return lhs_val == rhs_val
-        if op == "!=":
-            return lhs_val != rhs_val
-
-        lnum = self._to_number(lhs_val, line_no, "left side")
-        rnum = self._to_number(rhs_val, line_no, "right side")
-        if op == "<":
-            return lnum < rnum
-        if op == ">":
-            return lnum > rnum
-        if op == "<=":
-            return lnum <= rnum
-        if op == ">=":
-            return lnum >= rnum
-
-        raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown operator '{op}'"))
+        if op in _EQUALITY_OPS:
+            cmp = _EQUALITY_OPS[op]
+            lhs = self._compile_operand(lhs_tok)
+            rhs = self._compile_operand(rhs_tok)
+            return lambda ln: cmp(lhs(ln), rhs(ln))
+
+        lhs = self._compile_operand(lhs_tok, "left side")
+        rhs = self._compile_operand(rhs_tok, "right side")
+        cmp = _ORDER_OPS.get(op)
+        if cmp is None:
+            def bad_op(ln):
+                lhs(ln), rhs(ln)
+                raise SyntaxDeadBasicError(self._fmt(ln, f"unknown operator '{op}'"))
+            return bad_op
+        return lambda ln: cmp(lhs(ln), rhs(ln))
+
+    def _compile_operand(self, token, label=None):
+        """
+        Getter(line_no) for one side of a condition. A variable of that
+        name always wins (it may be declared after compiling); otherwise the
+        literal value, parsed once here. With a label the value is made
+        numeric.
+        """
+        vals = self.var_values
+        lit = self._consts[token]
+        if label is None:
+            return lambda ln: vals.get(token, lit)
+
+        to_num = self._to_number
+        def get(line_no):
+            v = vals.get(token, lit)
+            t = type(v)
+            # int and float compare exactly with each other (int vs int
+            # never touches floats), so only strings need converting
+            return v if t is int or t is float else to_num(v, line_no, label)
+        return get
 
     def _should_execute_if_body_line(self):
-        if self.if_ctx is None:
+        if not self._ctx_flags & _CTX_IF:
             return False
-        if not self.if_ctx["in_else"] and self.if_ctx["cond_true"]:
-            return True
-        if self.if_ctx["in_else"] and not self.if_ctx["cond_true"]:
-            return True
-        return False
+        return self.if_in_else != self.if_cond_true
 
     def _should_execute_try_body_line(self):
         if self.try_ctx is None:
@@ -179,7 +452,8 @@ class DeadBasic:
         if self.try_ctx and self.try_ctx["in_catch"] and self.try_ctx["err_name"]:
             name = self.try_ctx["err_name"]
             msg = self.try_ctx["err_msg"] if self.try_ctx["err_msg"] is not None else ""
-            self.vars[name] = {"type": "str", "value": str(msg)}
+            self.var_values[name] = str(msg)
+            self.var_types[name] = "str"
 
     # ---------- commands ----------
     def cmd_input(self, args, line_no):
@@ -209,77 +483,87 @@ class DeadBasic:
         else:
             raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown type: {vtype}"))
 
-        self.vars[name] = {"type": vtype, "value": val}
+        self.var_values[name] = val
+        self.var_types[name] = vtype
 
     def cmd_printtext(self, args, line_no):
         if not args:
             raise SyntaxDeadBasicError(self._fmt(line_no, "printtext needs text or var names"))
-        out = []
-        for tok in args:
-            if tok in self.vars:
-                out.append(str(self.vars[tok]["value"]))
-            else:
-                out.append(tok)
-        print(" ".join(out))
+        vals = self.var_values
+        _print(" ".join([str(vals[tok]) if tok in vals else tok for tok in args]))
 
     def cmd_showvars(self, args=None, line_no=None):
-        if not self.vars:
-            print("(no vars)")
+        if not self.var_values:
+            _print("(no vars)")
             return
-        for k, meta in self.vars.items():
-            print(f"{meta['type']} {k} = {meta['value']}"),
+        for k, value in self.var_values.items():
+            _print(f"{self.var_types[k]} {k} = {value}"),
 
     def cmd_openfile(self, args, line_no):
         if not args:
             raise SyntaxDeadBasicError(self._fmt(line_no, "openfile needs a filename"))
         path = pathlib.Path(args[0])
         # Clear dangling control states before jumping into another file
-        self.if_ctx = None
-        self.while_ctx = None
         self.try_ctx = None
+        self._ctx_flags = 0
         self.run_file(path)
 
     def cmd_add(self, args, line_no):
         if len(args) != 2:
             raise SyntaxDeadBasicError(self._fmt(line_no, "add needs exactly 2 numbers"))
-        a = self._to_number(self._resolve(args[0], line_no), line_no, "first argument")
-        b = self._to_number(self._resolve(args[1], line_no), line_no, "second argument")
+        self._add(args[0], args[1], line_no)
+
+    def _add(self, a_tok, b_tok, line_no):
+        a, b = self._num_args(a_tok, b_tok, line_no)
         result = a + b
-        print(int(result) if result.is_integer() else result)
+        # int op int stays an exact int; whole floats still print without ".0"
+        if type(result) is float and result.is_integer():
+            result = int(result)
+        _print(result)
 
     def cmd_squareroot(self, args, line_no):
         if len(args) > 1:
             raise SyntaxDeadBasicError(self._fmt(line_no, "Square root only needs 1 number"))
         a = self._to_number(self._resolve(args[0], line_no), line_no, "first argument")
         result = math.sqrt(a)
-        print(int(result) if result.is_integer() else result)
+        _print(int(result) if result.is_integer() else result)
 
     def cmd_subt(self, args, line_no):
         if len(args) != 2:
             raise SyntaxDeadBasicError(self._fmt(line_no, "Subtract needs exactly 2 numbers"))
-        a = self._to_number(self._resolve(args[0], line_no), line_no, "first argument")
-        b = self._to_number(self._resolve(args[1], line_no), line_no, "second argument")
+        self._subt(args[0], args[1], line_no)
+
+    def _subt(self, a_tok, b_tok, line_no):
+        a, b = self._num_args(a_tok, b_tok, line_no)
         result = a - b
-        print(int(result) if result.is_integer() else result)
+        if type(result) is float and result.is_integer():
+            result = int(result)
+        _print(result)
 
     def cmd_div(self, args, line_no):
         if len(args) != 2:
             raise SyntaxDeadBasicError(self._fmt(line_no, "Divide needs exactly 2 numbers"))
-        a = self._to_number(self._resolve(args[0], line_no), line_no, "first argument")
-        b = self._to_number(self._resolve(args[1], line_no), line_no, "second argument")
+        self._div(args[0], args[1], line_no)
+
+    def _div(self, a_tok, b_tok, line_no):
+        a, b = self._num_args(a_tok, b_tok, line_no)
         try:
             result = a / b
-            print(int(result) if result.is_integer() else result)
+            _print(int(result) if result.is_integer() else result)
         except ZeroDivisionError:
             raise RuntimeDeadBasicError(self._fmt(line_no, "You cannot divide by 0."))
 
     def cmd_multiply(self, args, line_no):
         if len(args) != 2:
             raise SyntaxDeadBasicError(self._fmt(line_no, "Multiply needs exactly 2 numbers"))
-        a = self._to_number(self._resolve(args[0], line_no), line_no, "first argument")
-        b = self._to_number(self._resolve(args[1], line_no), line_no, "second argument")
+        self._multiply(args[0], args[1], line_no)
+
+    def _multiply(self, a_tok, b_tok, line_no):
+        a, b = self._num_args(a_tok, b_tok, line_no)
         result = a * b
-        print(int(result) if result.is_integer() else result)
+        if type(result) is float and result.is_integer():
+            result = int(result)
+        _print(result)
 
     def cmd_declare(self, vtype, args, line_no):
         if len(args) < 2:
@@ -300,10 +584,12 @@ class DeadBasic:
             val = value_str.strip('"')
         else:
             raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown type: {vtype}"))
-        if name in self.vars and self.vars[name]["type"] != vtype:
+        old_type = self.var_types.get(name)
+        if old_type is not None and old_type != vtype:
             raise RuntimeDeadBasicError(self._fmt(line_no,
-                f"type mismatch: {name} is {self.vars[name]['type']}, not {vtype}"))
-        self.vars[name] = {"type": vtype, "value": val}
+                f"type mismatch: {name} is {old_type}, not {vtype}"))
+        self.var_values[name] = val
+        self.var_types[name] = vtype
 
     # ---------- single-line execution (REPL) ----------
     def execute_line(self, line, line_no):
@@ -313,11 +599,11 @@ class DeadBasic:
         raw = content.strip()
         if not raw:
             return
-        if raw.startswith("#") or raw.startswith("``"):
+        if raw.startswith(_SKIP_PREFIXES):
             return
 
         try:
-            tokens = shlex.split(raw, posix=True)
+            tokens = _tokenize(raw)
         except ValueError as e:
             raise SyntaxDeadBasicError(self._fmt(line_no, f"parse error: {e}"))
         if not tokens:
@@ -327,7 +613,7 @@ class DeadBasic:
         head_l = head.lower()
 
         # REPL: disallow while/endwhile (needs multi-line control)
-        if head_l in {"while", "endwhile"}:
+        if head_l in _LOOP_KEYWORDS:
             raise SyntaxDeadBasicError(self._fmt(line_no,
                 "while/endwhile are only supported in .ba files, not in REPL"))
 
@@ -337,9 +623,10 @@ class DeadBasic:
             if head_l == "try":
                 if self.try_ctx is not None:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "Nested TRY not supported"))
-                if self.if_ctx is not None:
+                if self._ctx_flags & _CTX_IF:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "TRY cannot start inside an open IF; close IF first"))
                 self.try_ctx = {"has_error": False, "in_catch": False, "err_name": None, "err_msg": None}
+                self._ctx_flags |= _CTX_TRY
                 return
             if head_l == "catch":
                 if self.try_ctx is None:
@@ -357,33 +644,36 @@ class DeadBasic:
                 if self.try_ctx is None:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "'endtry' without matching 'try'"))
                 self.try_ctx = None
+                self._ctx_flags &= ~_CTX_TRY
                 return
 
             # IF/ELSE/ENDIF handling at top level in REPL
             if head_l == "if":
-                if self.if_ctx is not None:
+                if self._ctx_flags & _CTX_IF:
                     raise SyntaxDeadBasicError(self._fmt(line_no,
                         "Nested IF not supported (previous IF missing 'endif'?)"))
                 if self.try_ctx is not None:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "IF cannot start inside an open TRY; close TRY first"))
                 cond = self._eval_condition_tokens(args, line_no)
-                self.if_ctx = {"cond_true": cond, "in_else": False}
+                self.if_cond_true = cond
+                self.if_in_else = False
+                self._ctx_flags |= _CTX_IF
                 return
             if head_l == "else":
-                if self.if_ctx is None:
+                if not self._ctx_flags & _CTX_IF:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "'else' without matching 'if'"))
-                if self.if_ctx["in_else"]:
+                if self.if_in_else:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "multiple 'else' not allowed"))
-                self.if_ctx["in_else"] = True
+                self.if_in_else = True
                 return
             if head_l == "endif":
-                if self.if_ctx is None:
+                if not self._ctx_flags & _CTX_IF:
                     raise SyntaxDeadBasicError(self._fmt(line_no, "'endif' without matching 'if'"))
-                self.if_ctx = None
+                self._ctx_flags &= ~_CTX_IF
                 return
 
             # If any block is open, only its headers allowed at top level
-            if self.if_ctx is not None:
+            if self._ctx_flags & _CTX_IF:
                 raise SyntaxDeadBasicError(self._fmt(line_no,
                     "Inside IF: expected an indented line (TAB/4 spaces), 'else', or 'endif'"))
             if self.try_ctx is not None:
@@ -399,11 +689,11 @@ class DeadBasic:
 
         # ---- Indented line (REPL)
         if indent == 1:
-            if head_l in {"if", "else", "endif", "while", "endwhile", "try", "catch", "endtry"}:
+            if head_l in _BLOCK_KEYWORDS:
                 raise SyntaxDeadBasicError(self._fmt(line_no, f"'{head_l}' must be at top level (no indent)"))
 
             # IF body?
-            if self.if_ctx is not None:
+            if self._ctx_flags & _CTX_IF:
                 if not self._should_execute_if_body_line():
                     return
                 if head_l in self.type_keywords:
@@ -426,7 +716,7 @@ class DeadBasic:
                     except DeadBasicError as e:
                         # record error & stop executing try body; wait for catch
                         self.try_ctx["has_error"] = True
-                        self.try_ctx["err_msg"] = str(e)
+                        self.try_ctx["err_msg"] = e   # formatted only if read
                     except Exception as e:
                         self.try_ctx["has_error"] = True
                         self.try_ctx["err_msg"] = f"Internal error: {e}"
@@ -447,236 +737,359 @@ class DeadBasic:
             raise SyntaxDeadBasicError(self._fmt(line_no,
                 "You are missing the required 'while/if/try' before this indented line"))
 
-    # ---------- file execution with program counter (supports WHILE, TRY) ----------
-    def run_file(self, path: pathlib.Path):
-        if not path.exists():
-            raise RuntimeDeadBasicError(self._fmt(0, f"file not found: {path}"))
-        self.current_file = str(path)
-        self.if_ctx = None
-        self.while_ctx = None
+    # ---------- run_file line handlers: (record, pc, line_no) -> next pc ----------
+    def _misplaced(self, head_l, line_no):
+        return SyntaxDeadBasicError(self._fmt(line_no, f"'{head_l}' must be at top level (no indent)"))
+
+    def _bind_statement(self, record, line_no):
+        """Zero-arg call that runs a declaration or command line."""
+        head, head_l, args, kind = record.head, record.head_l, record.args, record.kind
+        arg0, arg1 = record.arg0, record.arg1
+        if kind >= K_CMD:
+            return functools.partial(self._cmd_table[kind], args, line_no)
+        if kind >= K_ADD:
+            return functools.partial(self._cmd_table[kind], arg0, arg1, line_no)
+        if kind == K_DECL:
+            return functools.partial(self.cmd_declare, head_l, args, line_no)
+        return functools.partial(self._run_unknown, head, head_l, args, line_no)
+
+    def _run_unknown(self, head, head_l, args, line_no):
+        """K_UNKNOWN line: the command may have been added since lexing."""
+        cmd = self.commands.get(head_l)
+        if cmd is None:
+            raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown command: {head}"))
+        cmd(args, line_no)
+
+    def _h_error(self, record, pc, line_no):
+        raise SyntaxDeadBasicError(self._fmt(line_no, f"parse error: {record.args[0]}"))
+
+    def _h_while(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if self._ctx_flags & _CTX_WHILE:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "Nested WHILE not supported"))
+        if self._ctx_flags & _CTX_IF:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "WHILE cannot start inside an open IF; close IF first"))
+        if self.try_ctx is not None:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "WHILE cannot start inside an open TRY; close TRY first"))
+        cond_fn = self._conds[pc]
+        if cond_fn is None:
+            cond_fn = self._conds[pc] = self._compile_condition(record.args, line_no)
+        # skip straight past the matching endwhile when false
+        if not cond_fn(line_no):
+            resume = self._jump_table[pc]
+            if resume is None:
+                raise SyntaxDeadBasicError(self._fmt(line_no, "missing 'endwhile' for this 'while'"))
+            return resume
+        self.while_start_pc = pc
+        self.while_cond_fn = cond_fn
+        self._ctx_flags |= _CTX_WHILE
+        return pc + 1
+
+    def _h_endwhile(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if not self._ctx_flags & _CTX_WHILE:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "'endwhile' without matching 'while'"))
+        if self.while_cond_fn(line_no):
+            return self.while_start_pc + 1
+        self._ctx_flags &= ~_CTX_WHILE
+        return pc + 1
+
+    def _h_try(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if self.try_ctx is not None:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "Nested TRY not supported"))
+        if self._ctx_flags & _CTX_IF:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "TRY cannot start inside an open IF; close IF first"))
+        if self._ctx_flags & _CTX_WHILE:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "TRY cannot start inside an open WHILE; close WHILE first"))
+        self.try_ctx = {"has_error": False, "in_catch": False, "err_name": None, "err_msg": None}
+        self._ctx_flags |= _CTX_TRY
+        return pc + 1
+
+    def _h_catch(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        args = record.args
+        if self.try_ctx is None:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "'catch' without matching 'try'"))
+        if self.try_ctx["in_catch"]:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "multiple 'catch' not allowed"))
+        if len(args) > 1:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "catch takes zero or one var name"))
+        self.try_ctx["in_catch"] = True
+        self.try_ctx["err_name"] = (args[0] if args else None)
+        # assign err var now
+        self._enter_catch_if_needed()
+        return pc + 1 if self.try_ctx["has_error"] else self._jump_table[pc]
+
+    def _h_endtry(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if self.try_ctx is None:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "'endtry' without matching 'try'"))
         self.try_ctx = None
+        self._ctx_flags &= ~_CTX_TRY
+        return pc + 1
+
+    def _h_if(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if self._ctx_flags & _CTX_IF:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "Nested IF not supported (previous IF missing 'endif'?)"))
+        if self.try_ctx is not None:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "IF cannot start inside an open TRY; close TRY first"))
+        cond_fn = self._conds[pc]
+        if cond_fn is None:
+            cond_fn = self._conds[pc] = self._compile_condition(record.args, line_no)
+        cond = cond_fn(line_no)
+        self.if_cond_true = cond
+        self.if_in_else = False
+        self._ctx_flags |= _CTX_IF
+        return pc + 1 if cond else self._jump_table[pc]
+
+    def _h_else(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if not self._ctx_flags & _CTX_IF:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "'else' without matching 'if'"))
+        if self.if_in_else:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "multiple 'else' not allowed"))
+        self.if_in_else = True
+        return self._jump_table[pc] if self.if_cond_true else pc + 1
+
+    def _h_endif(self, record, pc, line_no):
+        if record.indent:
+            raise self._misplaced(record.head_l, line_no)
+        if not self._ctx_flags & _CTX_IF:
+            raise SyntaxDeadBasicError(self._fmt(line_no, "'endif' without matching 'if'"))
+        self._ctx_flags &= ~_CTX_IF
+        return pc + 1
+
+    def _h_top_statement(self, record, pc, line_no):
+        """Declaration or command at top level."""
+        flags = self._ctx_flags
+        if flags & (_CTX_IF | _CTX_TRY):
+            # If a block is open, limit headers at top level
+            if flags & _CTX_IF:
+                raise SyntaxDeadBasicError(self._fmt(line_no,
+                    "Inside IF: expected an indented body line (TAB/4 spaces), 'else', or 'endif'"))
+            raise SyntaxDeadBasicError(self._fmt(line_no,
+                "Inside TRY: expected an indented body line (TAB/4 spaces), 'catch', or 'endtry'"))
+        record.call()
+        return pc + 1
+
+    def _h_body_statement(self, record, pc, line_no):
+        """Indented declaration or command; owner decided from the open contexts."""
+        flags = self._ctx_flags
+
+        # IF body?
+        if flags & _CTX_IF:
+            if not self._should_execute_if_body_line():
+                return self._jump_table[pc]
+            record.call()
+            return pc + 1
+
+        # WHILE body?
+        if flags & _CTX_WHILE:
+            record.call()
+            return pc + 1
+
+        # TRY body?
+        if flags & _CTX_TRY:
+            if self._should_execute_try_body_line():
+                return self._run_try_statement(record, pc, line_no)
+            elif self._should_execute_catch_body_line():
+                # ensure err var present
+                self._enter_catch_if_needed()
+                record.call()
+            else:
+                # inside TRY but not active section -> skip
+                return self._jump_table[pc]
+            return pc + 1
 
-        with path.open("r", encoding="utf-8") as f:
-            lines = [ln.rstrip("\n") for ln in f]
-
-        pc = 0
-        n = len(lines)
-
-        def parse_tokens(line, lno):
-            indent, content = self._detect_indent(line)
-            raw = content.strip()
-            return indent, raw, (shlex.split(raw, posix=True) if raw and not raw.startswith(("#", "``")) else [])
+        # Indent but no block => syntax error
+        raise SyntaxDeadBasicError(self._fmt(line_no,
+            "You are missing the required 'while/if/try' before this indented line"))
 
-        while pc < n:
-            line_no = pc + 1
-            line = lines[pc]
-            indent, raw, tokens = parse_tokens(line, line_no)
+    def _h_if_body(self, record, pc, line_no):
+        """
+        Indented line lexically in an if/else arm. Dead arms are jumped
+        over from their header, so reaching one means the arm is live.
+        """
+        if not self._ctx_flags & _CTX_IF:
+            return self._h_body_statement(record, pc, line_no)
+        record.call()
+        return pc + 1
+
+    def _h_while_body(self, record, pc, line_no):
+        """Indented line lexically inside a WHILE."""
+        if self._ctx_flags != _CTX_WHILE:
+            return self._h_body_statement(record, pc, line_no)
+        record.call()
+        return pc + 1
+
+    def _h_try_body(self, record, pc, line_no):
+        """Indented line lexically in a TRY's try section."""
+        ctx = self.try_ctx
+        if self._ctx_flags != _CTX_TRY or ctx["in_catch"]:
+            return self._h_body_statement(record, pc, line_no)
+        if ctx["has_error"]:
+            return self._jump_table[pc]
+        return self._run_try_statement(record, pc, line_no)
+
+    def _h_catch_body(self, record, pc, line_no):
+        """Indented line lexically in a TRY's catch section."""
+        ctx = self.try_ctx
+        if self._ctx_flags != _CTX_TRY or not ctx["in_catch"]:
+            return self._h_body_statement(record, pc, line_no)
+        if not ctx["has_error"]:
+            return self._jump_table[pc]
+        self._enter_catch_if_needed()
+        record.call()
+        return pc + 1
+
+    def _run_try_statement(self, record, pc, line_no):
+        """Run a try-section line; an error marks the TRY and skips to its catch."""
+        try:
+            record.call()
+        except DeadBasicError as e:
+            self.try_ctx["has_error"] = True
+            self.try_ctx["err_msg"] = e   # formatted only if read
+            return self._jump_table[pc]
+        except Exception as e:
+            self.try_ctx["has_error"] = True
+            self.try_ctx["err_msg"] = f"Internal error: {e}"
+            return self._jump_table[pc]
+        return pc + 1
 
-            if not raw or raw.startswith("#") or raw.startswith("``"):
-                pc += 1
+    # ---------- file loading (lex + jump table, cached per file) ----------
+    def _load_program(self, path):
+        """
+        Lex path into (program, line_nos, n_lines, jump_table, ops, conds).
+        Kept in self._file_cache until the file's mtime or size changes, so
+        repeated openfile calls on the same file skip reading and lexing.
+        """
+        key = str(path.resolve())
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._file_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1:]
+
+        # One read, split in C. Not splitlines(): it also breaks on \f, \v,
+        # \x85 etc., which reading line by line never did.
+        lines = path.read_text(encoding="utf-8").split("\n")
+        if not lines[-1]:
+            lines.pop()   # text ended with a newline (or file is empty)
+
+        # Lex every line exactly once; run_file only indexes `program`.
+        # Blank and comment lines are dropped, so pc counts executable lines
+        # and line_nos[pc] maps back to the source line. Statement records
+        # get their command bound into `call`, so running one is just
+        # record.call().
+        program = []
+        line_nos = []
+        for line_no, ln in enumerate(lines, 1):
+            rec = self._lex_line(ln)
+            if rec.kind == K_BLANK:
                 continue
-
-            head, *args = tokens
-            head_l = head.lower()
-
-            # ---- Top-level control
+            if rec.kind >= K_DECL:
+                rec = rec._replace(call=self._bind_statement(rec, line_no))
+            program.append(rec)
+            line_nos.append(line_no)
+        n = len(program)
+
+        # jump_table[pc]: where to continue when the body after line pc is
+        # not run.
+        #   WHILE: just past the first top-level 'endwhile', or the first
+        #          unparsable line on the way (so it still reports); None
+        #          if there is no 'endwhile'.
+        #   other: the next line that is not an indented statement, i.e.
+        #          the else/endif/catch/endtry closing a well-formed body
+        #          (or the stray line that must report).
+        jump_table = [None] * n
+        resume = None
+        body_end = n
+        for i in range(n - 1, -1, -1):
+            indent, kind = program[i].indent, program[i].kind
+            jump_table[i] = resume if kind == K_WHILE else body_end
+            if kind == K_ENDWHILE and indent == 0:
+                resume = i + 1
+            elif kind == K_ERROR:
+                resume = i
+            if not (indent and kind >= K_DECL):
+                body_end = i
+
+        # owning_block[pc]: the block an indented line sits in, going by the
+        # last top-level header above it (BK_WHILE again after an inner
+        # if/try closes inside a loop).
+        owning_block = [BK_NONE] * n
+        owner = BK_NONE
+        in_while = False
+        for i in range(n):
+            indent, kind = program[i].indent, program[i].kind
             if indent == 0:
+                if kind == K_IF or kind == K_ELSE:
+                    owner = BK_IF
+                elif kind == K_WHILE:
+                    owner = BK_WHILE
+                    in_while = True
+                elif kind == K_TRY:
+                    owner = BK_TRY
+                elif kind == K_CATCH:
+                    owner = BK_CATCH
+                else:
+                    if kind == K_ENDWHILE:
+                        in_while = False
+                    owner = BK_WHILE if in_while else BK_NONE
+            owning_block[i] = owner
+
+        # ops[pc]: the handler run_file calls for line pc
+        dispatch = self._dispatch
+        body_dispatch = self._body_dispatch
+        ops = [body_dispatch[owning_block[i]] if rec.indent and rec.kind >= K_DECL
+               else dispatch[rec.kind]
+               for i, rec in enumerate(program)]
+
+        # conds[pc]: if/while conditions, compiled the first time they run
+        # (a malformed one keeps raising, in order, and is never stored)
+        conds = [None] * n
+
+        result = (program, line_nos, len(lines), jump_table, ops, conds)
+        self._file_cache[key] = (stamp,) + result
+        return result
 
-                # WHILE
-                if head_l == "while":
-                    if self.while_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "Nested WHILE not supported"))
-                    if self.if_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "WHILE cannot start inside an open IF; close IF first"))
-                    if self.try_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "WHILE cannot start inside an open TRY; close TRY first"))
-                    cond = self._eval_condition_tokens(args, line_no)
-                    # find matching endwhile to allow skipping when false
-                    if not cond:
-                        j = pc + 1
-                        found = False
-                        while j < n:
-                            i2, raw2, tok2 = parse_tokens(lines[j], j + 1)
-                            if i2 == 0 and tok2 and tok2[0].lower() == "endwhile":
-                                found = True
-                                break
-                            j += 1
-                        if not found:
-                            raise SyntaxDeadBasicError(self._fmt(line_no, "missing 'endwhile' for this 'while'"))
-                        pc = j + 1
-                        continue
-                    self.while_ctx = {"start_pc": pc, "cond_tokens": args}
-                    pc += 1
-                    continue
-
-                if head_l == "endwhile":
-                    if self.while_ctx is None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "'endwhile' without matching 'while'"))
-                    cond = self._eval_condition_tokens(self.while_ctx["cond_tokens"], line_no)
-                    if cond:
-                        pc = self.while_ctx["start_pc"] + 1
-                        continue
-                    else:
-                        self.while_ctx = None
-                        pc += 1
-                        continue
-
-                # TRY/CATCH/ENDTRY
-                if head_l == "try":
-                    if self.try_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "Nested TRY not supported"))
-                    if self.if_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "TRY cannot start inside an open IF; close IF first"))
-                    if self.while_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "TRY cannot start inside an open WHILE; close WHILE first"))
-                    self.try_ctx = {"has_error": False, "in_catch": False, "err_name": None, "err_msg": None}
-                    pc += 1
-                    continue
-
-                if head_l == "catch":
-                    if self.try_ctx is None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "'catch' without matching 'try'"))
-                    if self.try_ctx["in_catch"]:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "multiple 'catch' not allowed"))
-                    if len(args) > 1:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "catch takes zero or one var name"))
-                    self.try_ctx["in_catch"] = True
-                    self.try_ctx["err_name"] = (args[0] if args else None)
-                    # assign err var now
-                    self._enter_catch_if_needed()
-                    pc += 1
-                    continue
-
-                if head_l == "endtry":
-                    if self.try_ctx is None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "'endtry' without matching 'try'"))
-                    self.try_ctx = None
-                    pc += 1
-                    continue
-
-                # IF
-                if head_l == "if":
-                    if self.if_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "Nested IF not supported (previous IF missing 'endif'?)"))
-                    if self.while_ctx is not None:
-                        pass
-                    if self.try_ctx is not None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "IF cannot start inside an open TRY; close TRY first"))
-                    cond = self._eval_condition_tokens(args, line_no)
-                    self.if_ctx = {"cond_true": cond, "in_else": False}
-                    pc += 1
-                    continue
-
-                if head_l == "else":
-                    if self.if_ctx is None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "'else' without matching 'if'"))
-                    if self.if_ctx["in_else"]:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "multiple 'else' not allowed"))
-                    self.if_ctx["in_else"] = True
-                    pc += 1
-                    continue
-
-                if head_l == "endif":
-                    if self.if_ctx is None:
-                        raise SyntaxDeadBasicError(self._fmt(line_no, "'endif' without matching 'if'"))
-                    self.if_ctx = None
-                    pc += 1
-                    continue
-
-                # If a block is open, limit headers at top level
-                if self.if_ctx is not None:
-                    raise SyntaxDeadBasicError(self._fmt(line_no,
-                        "Inside IF: expected an indented body line (TAB/4 spaces), 'else', or 'endif'"))
-                if self.try_ctx is not None:
-                    raise SyntaxDeadBasicError(self._fmt(line_no,
-                        "Inside TRY: expected an indented body line (TAB/4 spaces), 'catch', or 'endtry'"))
-
-                # Declarations / Commands
-                if head_l in self.type_keywords:
-                    self.cmd_declare(head_l, args, line_no)
-                    pc += 1
-                    continue
-                if head_l not in self.commands:
-                    raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown command: {head}"))
-                self.commands[head_l](args, line_no)
-                pc += 1
-                continue
+    # ---------- file execution with program counter (supports WHILE, TRY) ----------
+    def run_file(self, path: pathlib.Path):
+        if not path.exists():
+            raise RuntimeDeadBasicError(self._fmt(0, f"file not found: {path}"))
+        self.current_file = str(path)
+        self.try_ctx = None
+        self._ctx_flags = 0
 
-            # ---- Indented body line (IF, WHILE, TRY)
-            if indent == 1:
-                if head_l in {"if", "else", "endif", "while", "endwhile", "try", "catch", "endtry"}:
-                    raise SyntaxDeadBasicError(self._fmt(line_no, f"'{head_l}' must be at top level (no indent)"))
+        program, line_nos, n_lines, jump_table, ops, conds = self._load_program(path)
+        n = len(program)
 
-                # IF body?
-                if self.if_ctx is not None:
-                    if not self._should_execute_if_body_line():
-                        pc += 1
-                        continue
-                    if head_l in self.type_keywords:
-                        self.cmd_declare(head_l, args, line_no)
-                    else:
-                        if head_l not in self.commands:
-                            raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown command: {head}"))
-                        self.commands[head_l](args, line_no)
-                    pc += 1
-                    continue
-
-                # WHILE body?
-                if self.while_ctx is not None:
-                    if head_l in self.type_keywords:
-                        self.cmd_declare(head_l, args, line_no)
-                    else:
-                        if head_l not in self.commands:
-                            raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown command: {head}"))
-                        self.commands[head_l](args, line_no)
-                    pc += 1
-                    continue
-
-                # TRY body?
-                if self.try_ctx is not None:
-                    if self._should_execute_try_body_line():
-                        try:
-                            if head_l in self.type_keywords:
-                                self.cmd_declare(head_l, args, line_no)
-                            else:
-                                if head_l not in self.commands:
-                                    raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown command: {head}"))
-                                self.commands[head_l](args, line_no)
-                        except DeadBasicError as e:
-                            self.try_ctx["has_error"] = True
-                            self.try_ctx["err_msg"] = str(e)
-                        except Exception as e:
-                            self.try_ctx["has_error"] = True
-                            self.try_ctx["err_msg"] = f"Internal error: {e}"
-                        pc += 1
-                        continue
-                    elif self._should_execute_catch_body_line():
-                        # ensure err var present
-                        self._enter_catch_if_needed()
-                        if head_l in self.type_keywords:
-                            self.cmd_declare(head_l, args, line_no)
-                        else:
-                            if head_l not in self.commands:
-                                raise SyntaxDeadBasicError(self._fmt(line_no, f"unknown command: {head}"))
-                            self.commands[head_l](args, line_no)
-                        pc += 1
-                        continue
-                    else:
-                        # inside TRY but not active section -> skip
-                        pc += 1
-                        continue
-
-                # Indent but no block => syntax error
-                raise SyntaxDeadBasicError(self._fmt(line_no,
-                    "You are missing the required 'while/if/try' before this indented line"))
+        # openfile runs another file mid-program; keep the caller's tables
+        outer_jump_table, outer_conds = self._jump_table, self._conds
+        self._jump_table, self._conds = jump_table, conds
+        try:
+            pc = 0
+            while pc < n:
+                pc = ops[pc](program[pc], pc, line_nos[pc])
+        finally:
+            self._jump_table, self._conds = outer_jump_table, outer_conds
 
         # End of file: check for dangling blocks
-        if self.if_ctx is not None:
-            raise SyntaxDeadBasicError(self._fmt(n, "file ended but 'endif' is missing"))
-        if self.while_ctx is not None:
-            raise SyntaxDeadBasicError(self._fmt(n, "file ended but 'endwhile' is missing"))
+        if self._ctx_flags & _CTX_IF:
+            raise SyntaxDeadBasicError(self._fmt(n_lines, "file ended but 'endif' is missing"))
+        if self._ctx_flags & _CTX_WHILE:
+            raise SyntaxDeadBasicError(self._fmt(n_lines, "file ended but 'endwhile' is missing"))
         if self.try_ctx is not None:
-            raise SyntaxDeadBasicError(self._fmt(n, "file ended but 'endtry' is missing"))
+            raise SyntaxDeadBasicError(self._fmt(n_lines, "file ended but 'endtry' is missing"))
 
 # ---------- CLI / REPL ----------
 def usage():
@@ -721,9 +1134,18 @@ if __name__ == "__main__":
         repl()
     elif len(sys.argv) == 2:
         prog = pathlib.Path(sys.argv[1])
+        # Block-buffer program output even on a terminal instead of flushing
+        # every line; input() flushes it before prompting, exit flushes the rest.
+        if hasattr(sys.stdout, "reconfigure"):
+            sys.stdout.reconfigure(line_buffering=False)
         db = DeadBasic()
         try:
-            db.run_file(prog)
+            try:
+                db.run_file(prog)
+            finally:
+                # whatever ends the run (errors, Ctrl-C), program output
+                # goes out before anything is written to stderr
+                sys.stdout.flush()
         except DeadBasicError as e:
             print(e, file=sys.stderr)
             sys.exit(1)